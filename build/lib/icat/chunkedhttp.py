@@ -0,0 +1,404 @@
+"""HTTP with chunked transfer encoding for urllib.
+
+.. note::
+   This module is included here because python-icat uses it
+   internally, but it is not considered to be part of the API.
+   Changes in this module are not considered API changes of
+   python-icat.  It may even be removed from future versions of the
+   python-icat distribution without further notice.
+
+This module provides modified versions of HTTPHandler and HTTPSHandler
+from urllib.  These handlers differ from the standard counterparts in
+that they are able to send the data using chunked transfer encoding to
+the HTTP server.
+
+Note that although the handlers are designed as drop in replacements
+for the standard counterparts, we do not intent to catch all corner
+cases and be fully compatible in all situations.  The implementations
+here shall be just good enough for the use cases in IDSClient.
+
+Starting with Python 3.6.0, support for chunked transfer encoding has
+been added to the standard library, see `Issue 12319`_.  As a result,
+this module is obsolete for newer Python versions and python-icat will
+use it only for older versions.
+
+.. _Issue 12319: https://bugs.python.org/issue12319
+"""
+
+import errno
+import http.client
+import select
+import socket
+import threading
+import urllib.error
+import urllib.request
+
+
+# We always set the Content-Length header for these methods because some
+# servers will otherwise respond with a 411
+_METHODS_EXPECTING_BODY = {'PATCH', 'POST', 'PUT'}
+
+_CRLF = b"\r\n"
+_TERMINATOR = b"0\r\n\r\n"
+
+# Default size of the chunks read from a file body.
+DEFAULT_CHUNK_SIZE = 65536
+
+# Framed chunks are collected in a buffer and only passed on to
+# send() once the buffer exceeds this size.  This avoids a separate
+# write to the socket for each small chunk.
+FLUSH_THRESHOLD = 65536
+
+# Maximum number of connections per host kept by the handlers for
+# reuse.
+MAX_POOL_CONNECTIONS = 4
+
+def stringiterator(buffer):
+    """Wrap a string in an iterator that yields it in one single chunk."""
+    if len(buffer) > 0:
+        yield buffer
+
+def fileiterator(f, chunksize=DEFAULT_CHUNK_SIZE):
+    """Yield the content of a file by chunks of a given size at a time."""
+    while True:
+        chunk = f.read(chunksize)
+        if not chunk:
+            break
+        yield chunk
+
+def _is_connection_dropped(conn):
+    """Check whether an idle connection has been closed by the peer.
+
+    There should be nothing to read from an idle connection.  If the
+    socket is readable nevertheless, the server either closed the
+    connection or sent something unexpected.  Don't use the
+    connection in either case.
+    """
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+class HTTPResponse(http.client.HTTPResponse):
+    """Keep track of whether the response has been read completely.
+
+    The connection can only be reused for the next request if the
+    body of the previous response has been read to the end.
+    """
+
+    aborted = False
+
+    def close(self):
+        if not self.isclosed():
+            # closed before the end of the body has been reached.
+            self.aborted = True
+        super().close()
+
+class HTTPConnectionMixin:
+    """Implement chunked transfer encoding in HTTP.
+
+    This is designed as a mixin class to modify either HTTPConnection
+    or HTTPSConnection accordingly.
+    """
+
+    response_class = HTTPResponse
+
+    def connect(self):
+        super().connect()
+        # Disable Nagle's algorithm.  We take care to pass the body to
+        # send() in reasonably large pieces ourselves, waiting for the
+        # ACK before sending the last small piece would only add a
+        # delay.  Newer Python versions do this in the standard
+        # library, older ones don't.  Might fail in OSs that don't
+        # implement TCP_NODELAY.
+        try:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError as e:
+            if e.errno != errno.ENOPROTOOPT:
+                raise
+
+    def _send_request(self, method, url, body, headers, encode_chunked=False):
+        # This method is taken and modified from the Python 2.7
+        # httplib.py to prevent it from trying to set a Content-length
+        # header and to hook in our send_body() method.
+        # Admitted, it's an evil hack.
+        header_names = {k.lower(): k for k in headers.keys()}
+        skips = {}
+        if 'host' in header_names:
+            skips['skip_host'] = 1
+        if 'accept-encoding' in header_names:
+            skips['skip_accept_encoding'] = 1
+
+        self.putrequest(method, url, **skips)
+
+        chunked = False
+        if 'transfer-encoding' in header_names:
+            if headers[header_names['transfer-encoding']] == 'chunked':
+                chunked = True
+            else:
+                raise http.client.HTTPException("Invalid Transfer-Encoding")
+
+        for hdr, value in headers.items():
+            self.putheader(hdr, value)
+        self.endheaders()
+        self.send_body(body, chunked)
+
+    def send_body(self, body, chunked):
+        """Send the body, either as is or chunked.
+
+        The empty line separating the headers from the body must have
+        been sent before calling this method.
+        """
+        if body is not None:
+            if isinstance(body, str):
+                body = body.encode('ascii')
+            if isinstance(body, bytes):
+                # The common case of a short body given as a string:
+                # send it in one go, without any iterator machinery.
+                if not chunked:
+                    self.send(body)
+                elif body:
+                    size = ("%x\r\n" % len(body)).encode('ascii')
+                    self.send(b"".join((size, body, _CRLF, _TERMINATOR)))
+                else:
+                    self.send(_TERMINATOR)
+                return
+            elif hasattr(body, 'read'):
+                bodyiter = fileiterator(body, DEFAULT_CHUNK_SIZE)
+            elif hasattr(body, '__iter__'):
+                bodyiter = body
+            else:
+                raise TypeError("expect either a string, a file, "
+                                "or an iterable")
+            if chunked:
+                buf = bytearray()
+                for chunk in bodyiter:
+                    # Note: formatting bytes with % needs Python 3.5.
+                    buf += ("%x\r\n" % len(chunk)).encode('ascii')
+                    if len(chunk) >= FLUSH_THRESHOLD:
+                        # Large chunks are sent as they are, rather
+                        # than copying them into the buffer first.
+                        self.send(bytes(buf))
+                        buf.clear()
+                        self.send(chunk)
+                    else:
+                        buf += chunk
+                    buf += _CRLF
+                    if len(buf) >= FLUSH_THRESHOLD:
+                        self.send(bytes(buf))
+                        buf.clear()
+                buf += _TERMINATOR
+                self.send(bytes(buf))
+            else:
+                for chunk in bodyiter:
+                    self.send(chunk)
+
+class HTTPConnection(HTTPConnectionMixin, http.client.HTTPConnection):
+    pass
+
+class HTTPSConnection(HTTPConnectionMixin, http.client.HTTPSConnection):
+    pass
+
+
+class HTTPHandlerMixin:
+    """Internal helper class.
+
+    This is designed as a mixin class to modify either HTTPHandler or
+    HTTPSHandler accordingly.  It overrides do_request_() and
+    do_open() inherited from AbstractHTTPHandler.
+
+    In contrast to the standard handlers, connections are kept open
+    after the response has been read and reused for subsequent
+    requests to the same host.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Idle connections, ready for reuse.
+        self._connections = {}
+        # Connections along with their response that is still being
+        # read.  They are moved to _connections once the response has
+        # been read completely.
+        self._pending = {}
+        self._connections_lock = threading.Lock()
+
+    def _collect_pending(self, key):
+        """Move the connections whose response has been read to the
+        end from the pending list to the pool of idle connections.
+
+        Must be called with the lock held.
+        """
+        pending = self._pending.get(key, [])
+        idle = self._connections.setdefault(key, [])
+        for h, r in list(pending):
+            if not r.isclosed():
+                # Still in use.
+                continue
+            pending.remove((h, r))
+            if r.aborted or not h.sock:
+                h.close()
+            else:
+                idle.append(h)
+        while len(idle) > MAX_POOL_CONNECTIONS:
+            # These connections are idle, so it is safe to close them.
+            idle.pop(0).close()
+
+    def _get_connection(self, key):
+        """Take a connection that is ready for reuse from the pool.
+        Return :const:`None` if there is none.
+        """
+        with self._connections_lock:
+            self._collect_pending(key)
+            idle = self._connections[key]
+            while idle:
+                h = idle.pop()
+                if _is_connection_dropped(h):
+                    h.close()
+                else:
+                    return h
+        return None
+
+    def _put_connection(self, key, h, r):
+        """Keep track of a connection, along with its current
+        response, in order to reuse it once the response has been
+        read.
+        """
+        with self._connections_lock:
+            pending = self._pending.setdefault(key, [])
+            pending.append((h, r))
+            while len(pending) > MAX_POOL_CONNECTIONS:
+                # Some callers never read the response.  Don't let the
+                # pending list grow without bounds, but just forget
+                # about the oldest connection rather than closing it:
+                # that would also close the response, that might
+                # still be read.
+                pending.pop(0)
+
+    def close(self):
+        """Close all idle connections.
+
+        Note that :meth:`urllib.request.OpenerDirector.close` does not
+        call this, it must be called on the handler explicitly.
+        Connections with a response that is still being read are left
+        alone.
+        """
+        with self._connections_lock:
+            for key in list(self._pending.keys()):
+                self._collect_pending(key)
+            for conns in self._connections.values():
+                for h in conns:
+                    h.close()
+            self._connections.clear()
+            self._pending.clear()
+        super().close()
+
+    def do_open(self, http_class, req, **http_conn_args):
+        # The original method from AbstractHTTPHandler forces the
+        # connection to be closed after each request.  This is a
+        # modified version that takes the connection from the pool
+        # and puts it back there afterwards.
+        if req._tunnel_host:
+            # Don't bother to reuse connections tunneled through a
+            # proxy.
+            return super().do_open(http_class, req, **http_conn_args)
+
+        host = req.host
+        if not host:
+            raise urllib.error.URLError('no host given')
+
+        key = (http_class, host, req.timeout)
+        h = self._get_connection(key)
+        if h is None:
+            h = http_class(host, timeout=req.timeout, **http_conn_args)
+        h.set_debuglevel(self._debuglevel)
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items()
+                        if k not in headers})
+        headers = {name.title(): val for name, val in headers.items()}
+
+        try:
+            try:
+                h.request(req.get_method(), req.selector, req.data, headers)
+            except OSError as err:
+                raise urllib.error.URLError(err)
+            r = h.getresponse()
+        except:
+            h.close()
+            raise
+
+        # If the server requested to close the connection,
+        # HTTPConnection already did that and there is no use in
+        # keeping it.
+        if h.sock:
+            self._put_connection(key, h, r)
+
+        r.url = req.get_full_url()
+        r.msg = r.reason
+        return r
+
+    def do_request_(self, request):
+        # The original method from AbstractHTTPHandler sets some
+        # defaults that are unsuitable for our use case.  In
+        # particular it tries to enforce Content-length to be set (and
+        # fails doing so if data is not a string), while for chunked
+        # transfer encoding Content-length must not be set.
+
+        if not request.host:
+            raise urllib.error.URLError('no host given')
+
+        if request.data is not None:
+            if not request.has_header('Content-type'):
+                raise urllib.error.URLError('no Content-type header given')
+            if not request.has_header('Content-length'):
+                if isinstance(request.data, (bytes, str)):
+                    request.add_unredirected_header(
+                        'Content-length', '%d' % len(request.data))
+                else:
+                    request.add_unredirected_header(
+                        'Transfer-Encoding', 'chunked')
+        else:
+            if request.get_method().upper() in _METHODS_EXPECTING_BODY:
+                request.add_unredirected_header('Content-length', '0')
+
+        sel_host = request.host
+        if request.has_proxy():
+            scheme, sel = splittype(request.selector)
+            sel_host, sel_path = splithost(sel)
+        if not request.has_header('Host'):
+            request.add_unredirected_header('Host', sel_host)
+        if not request.has_header('Connection'):
+            request.add_unredirected_header('Connection', 'keep-alive')
+        for name, value in self.parent.addheaders:
+            name = name.capitalize()
+            if not request.has_header(name):
+                request.add_unredirected_header(name, value)
+
+        return request
+
+class HTTPHandler(HTTPHandlerMixin, urllib.request.HTTPHandler):
+
+    def http_open(self, req):
+        return self.do_open(HTTPConnection, req)
+
+    http_request = HTTPHandlerMixin.do_request_
+
+class HTTPSHandler(HTTPHandlerMixin, urllib.request.HTTPSHandler):
+
+    def https_open(self, req):
+        if hasattr(self, '_context') and hasattr(self, '_check_hostname'):
+            # Python 3.2 and newer
+            return self.do_open(HTTPSConnection, req,
+                                context=self._context, 
+                                check_hostname=self._check_hostname)
+        elif hasattr(self, '_context'):
+            # Python 2.7.9
+            return self.do_open(HTTPSConnection, req,
+                                context=self._context)
+        else:
+            # Python 2.7.8 or 3.1 and older
+            return self.do_open(HTTPSConnection, req)
+
+    https_request = HTTPHandlerMixin.do_request_
+
@@ -0,0 +1,399 @@
+"""YAML data file backend for icatdump.py and icatingest.py.
+"""
+
+import datetime
+import io
+import yaml
+import icat
+import icat.dumpfile
+import icat.entity
+try:
+    # Use the libyaml based loader if available, it is considerably
+    # faster than the pure Python one.
+    from yaml import CSafeLoader as _YLoader
+except ImportError:
+    from yaml import SafeLoader as _YLoader
+try:
+    utc = datetime.timezone.utc
+except AttributeError:
+    try:
+        from suds.sax.date import UtcTimezone
+        utc = UtcTimezone()
+    except ImportError:
+        utc = None
+
+_datetime = datetime.datetime
+_SORTKEY = icat.entity.Entity.__sortkey__
+
+
+class _YDumper(yaml.SafeDumper):
+    """The YAML dumper used to write data files.
+
+    Note that we deliberately do not base this on the libyaml based
+    dumper: it formats long mapping keys differently, so the output
+    would depend on whether libyaml is installed or not.
+
+    The data written never contains the same object twice, so there
+    is no need to keep track of the objects represented in order to
+    detect aliases.
+    """
+
+    def ignore_aliases(self, data):
+        return True
+
+
+# List of entity types.  This defines in particular the order in which
+# the types must be restored.
+entitytypes = [
+    'user',
+    'grouping',
+    'userGroup',
+    'rule',
+    'publicStep',
+    'facility',
+    'instrument',
+    'instrumentScientist',
+    'parameterType',
+    'permissibleStringValue',
+    'investigationType',
+    'sampleType',
+    'datasetType',
+    'datafileFormat',
+    'facilityCycle',
+    'application',
+    'investigation',
+    'investigationParameter',
+    'keyword',
+    'publication',
+    'shift',
+    'investigationGroup',
+    'investigationInstrument',
+    'investigationUser',
+    'sample',
+    'sampleParameter',
+    'dataset',
+    'datasetParameter',
+    'datafile',
+    'datafileParameter',
+    'study',
+    'studyInvestigation',
+    'relatedDatafile',
+    'dataCollection',
+    'dataCollectionParameter',
+    'dataCollectionDataset',
+    'dataCollectionDatafile',
+    'job',
+]
+
+
+# ------------------------------------------------------------
+# YAMLDumpFileReader
+# ------------------------------------------------------------
+
+class YAMLDumpFileReader(icat.dumpfile.DumpFileReader):
+    """Backend for reading ICAT data from a YAML file.
+
+    :param client: a client object configured to connect to the ICAT
+        server that the objects in the data file belong to.
+    :type client: :class:`icat.client.Client`
+    :param infile: the data source to read the objects from.  This
+        backend accepts a file object or a file name.
+    """
+
+    mode = "rt"
+    """File mode suitable for this backend.
+    """
+
+    def __init__(self, client, infile):
+        super().__init__(client, infile)
+        self.insttypemap = { c.BeanName:t 
+                             for t,c in self.client.typemap.items() }
+        self.mreltypemap = {}
+
+    def _getmreltype(self, cls, attr):
+        """Return the instance type of the objects related to entity
+        class cls in the one to many relation attr.
+
+        Cache the result in mreltypemap to avoid querying the entity
+        info for each object.
+        """
+        k = (cls.BeanName, attr)
+        try:
+            return self.mreltypemap[k]
+        except KeyError:
+            rtype = self.insttypemap[cls.getAttrInfo(self.client, attr).type]
+            self.mreltypemap[k] = rtype
+            return rtype
+
+    def _collectkeys(self, d, cls, keys):
+        """Add the keys of all objects referenced from a dict of
+        attributes to the set keys.
+        """
+        for k, v in d.items():
+            attr = cls.AttrAlias.get(k, k)
+            if attr in cls.InstRel:
+                keys.add(v)
+            elif attr in cls.InstMRel:
+                rcls = self.client.typemap[self._getmreltype(cls, attr)]
+                for rd in v:
+                    self._collectkeys(rd, rcls, keys)
+
+    def _dict2entity(self, d, objtype, objindex):
+        """Create an entity object from a dict of attributes."""
+        obj = self.client.new(objtype)
+        # The attribute sets are frozensets already, just avoid
+        # looking them up in the class for each attribute.
+        attrAlias = obj.AttrAlias
+        instAttr = obj.InstAttr
+        instRel = obj.InstRel
+        instMRel = obj.InstMRel
+        instance = obj.instance
+        for k, v in d.items():
+            attr = attrAlias.get(k, k)
+            if attr in instAttr:
+                # Entity.__setattr__() would do nothing else than
+                # this, but only after some more checks.
+                setattr(instance, attr, v)
+            elif attr in instRel:
+                robj = self.client.searchUniqueKey(v, objindex)
+                setattr(obj, attr, robj)
+            elif attr in instMRel:
+                rtype = self._getmreltype(type(obj), attr)
+                rlist = getattr(obj, attr)
+                for rd in v:
+                    robj = self._dict2entity(rd, rtype, objindex)
+                    rlist.append(robj)
+            else:
+                raise ValueError("invalid attribute '%s' in '%s'" 
+                                 % (k, objtype))
+        return obj
+
+    def getdata(self):
+        """Iterate over the chunks in the data file.
+        """
+        # yaml.load_all() returns a generator that yield one chunk
+        # (YAML document) from the file in each iteration.
+        return yaml.load_all(self.infile, Loader=_YLoader)
+
+    def getobjs_from_data(self, data, objindex):
+        """Iterate over the objects in a data chunk.
+
+        Yield a new entity object in each iteration.  The object is
+        initialized from the data, but not yet created at the client.
+        """
+        # check first that the chunk contains only known entries
+        for name in data.keys():
+            if name not in entitytypes:
+                raise RuntimeError("Unknown entry %s in the data." % name)
+        present = [name for name in entitytypes if name in data]
+        # Search the referenced objects in advance in a few bulk
+        # calls rather than one by one.  Skip those that are defined
+        # in this chunk, they do not exist yet.
+        keys = set()
+        for name in present:
+            cls = self.client.typemap[name]
+            for d in data[name].values():
+                self._collectkeys(d, cls, keys)
+        for name in present:
+            keys.difference_update(data[name].keys())
+        keys.difference_update(objindex.keys())
+        if keys:
+            self.client.searchUniqueKeys(keys, objindex)
+        for name in present:
+            objs = data[name]
+            for key in sorted(objs):
+                obj = self._dict2entity(objs[key], name, objindex)
+                yield key, obj
+
+
+# ------------------------------------------------------------
+# YAMLDumpFileWriter
+# ------------------------------------------------------------
+
+class YAMLDumpFileWriter(icat.dumpfile.DumpFileWriter):
+    """Backend for writing ICAT data to a YAML file.
+
+    :param client: a client object configured to connect to the ICAT
+        server to search the data objects from.
+    :type client: :class:`icat.client.Client`
+    :param outfile: the data file to write the objects to.  This
+        backend accepts a file object or a file name.
+    """
+
+    mode = "wt"
+    """File mode suitable for this backend.
+    """
+
+    bufsize = 1048576
+    """Size of the buffer to collect the output in before writing it
+    to the data file.
+    """
+
+    def __init__(self, client, outfile):
+        super().__init__(client, outfile)
+        self.data = {}
+
+    def _entity2dict(self, obj, keyindex):
+        """Convert an entity object to a dict."""
+        # Bind some frequently used objects to local names, this
+        # method is called for each and every object in the dump.
+        datetime_type = _datetime
+        sortkey = _SORTKEY
+        typemap = self.client.typemap
+        # Related objects in one to many relations are converted to
+        # dicts embedded in the dict of their parent.  Rather than
+        # recursing into them, keep a list of pending objects, each
+        # along with the (yet empty) dict it is to be converted into.
+        d = {}
+        pending = [(obj, d)]
+        while pending:
+            obj, od = pending.pop()
+            # The values of the attributes are stored in the
+            # instance, read them directly from there rather than
+            # going through Entity.__getattr__() for each of them.
+            instance = obj.instance
+            for attr in obj.InstAttr:
+                if attr == 'id':
+                    continue
+                v = getattr(instance, attr, None)
+                if v is None:
+                    continue
+                elif isinstance(v, str):
+                    # The most common case, so test it first.  Suds
+                    # may yield a subclass of str, but the dumper
+                    # only knows how to represent str.
+                    v = str(v)
+                elif isinstance(v, bool):
+                    pass
+                elif isinstance(v, int):
+                    v = int(v)
+                elif isinstance(v, datetime_type):
+                    if (v.tzinfo is not None and
+                        v.tzinfo.utcoffset(v) is not None):
+                        # v has timezone info.  This will be the
+                        # timezone set in the ICAT server.  Convert it
+                        # to UTC to avoid dependency of server
+                        # settings in the dumpfile.  Assume
+                        # v.isoformat() to have a valid timezone
+                        # suffix.
+                        if utc:
+                            v = v.astimezone(utc)
+                        v = v.isoformat()
+                    else:
+                        # v has no timezone info, assume it to be UTC,
+                        # append the corresponding timezone suffix.
+                        v = v.isoformat() + 'Z'
+                else:
+                    v = str(v)
+                od[attr] = v
+            for attr in obj.InstRel:
+                ri = getattr(instance, attr, None)
+                if ri is None:
+                    continue
+                # Related objects are typically referenced many times
+                # and their key is then found in keyindex.  Look it
+                # up there directly, so that we don't need to create
+                # an entity object for the related instance each time.
+                kid = (typemap[ri.__class__.__name__].BeanName,
+                       getattr(ri, 'id', None))
+                if keyindex is not None and kid in keyindex:
+                    od[attr] = keyindex[kid]
+                else:
+                    o = self.client.new(ri)
+                    od[attr] = o.getUniqueKey(keyindex=keyindex)
+            for attr in obj.InstMRel:
+                # Check the list of related instances first, so that
+                # empty relations need not be wrapped in an EntityList.
+                if getattr(instance, attr, None):
+                    rl = od[attr] = []
+                    for o in sorted(getattr(obj, attr), key=sortkey):
+                        rd = {}
+                        rl.append(rd)
+                        pending.append((o, rd))
+        return d
+
+    def head(self):
+        """Write a header with some meta information to the data file."""
+        dateformat = "%a, %d %b %Y %H:%M:%S +0000"
+        date = datetime.datetime.utcnow().strftime(dateformat)
+        head = """%%YAML 1.1
+# Date: %s
+# Service: %s
+# ICAT-API: %s
+# Generator: icatdump (python-icat %s)
+""" % (date, self.client.url, self.client.apiversion, icat.__version__)
+        self.outfile.write(head)
+
+    def _dumpdata(self):
+        """Write the current data chunk to the data file.
+
+        The result is the same as from yaml.dump(self.data), but we
+        emit the enclosing mappings ourselves and let the dumper
+        represent only one object at a time.  This avoids having the
+        YAML node graph for the complete chunk in memory at once.
+
+        The dumper writes its output in many small pieces.  Collect
+        them in a buffer and only write that to the data file once it
+        is full.
+        """
+        buf = io.StringIO()
+        def flush():
+            self.outfile.write(buf.getvalue())
+            buf.seek(0)
+            buf.truncate()
+        def dumpnode(dumper, data):
+            node = dumper.represent_data(data)
+            dumper.anchor_node(node)
+            dumper.serialize_node(node, None, None)
+            dumper.serialized_nodes = {}
+            dumper.anchors = {}
+            if buf.tell() >= self.bufsize:
+                flush()
+        dumper = _YDumper(buf, default_flow_style=False)
+        try:
+            dumper.open()
+            dumper.emit(yaml.DocumentStartEvent(explicit=True))
+            dumper.emit(yaml.MappingStartEvent(None, None, True,
+                                               flow_style=False))
+            for tag in sorted(self.data):
+                dumpnode(dumper, tag)
+                dumper.emit(yaml.MappingStartEvent(None, None, True,
+                                                   flow_style=False))
+                objs = self.data[tag]
+                for key in sorted(objs):
+                    dumpnode(dumper, key)
+                    dumpnode(dumper, objs[key])
+                dumper.emit(yaml.MappingEndEvent())
+            dumper.emit(yaml.MappingEndEvent())
+            dumper.emit(yaml.DocumentEndEvent(explicit=False))
+            dumper.close()
+            flush()
+        finally:
+            dumper.dispose()
+
+    def startdata(self):
+        """Start a new data chunk.
+
+        If the current chunk contains any data, write it to the data
+        file.
+        """
+        if self.data:
+            self._dumpdata()
+        self.data = {}
+
+    def writeobj(self, key, obj, keyindex):
+        """Add an entity object to the current data chunk."""
+        tag = obj.instancetype
+        if tag not in entitytypes:
+            raise ValueError("Unknown entity type '%s'" % tag)
+        if tag not in self.data:
+            self.data[tag] = {}
+        self.data[tag][key] = self._entity2dict(obj, keyindex)
+
+    def finalize(self):
+        """Finalize the data file."""
+        self.startdata()
+        self.outfile.flush()
+
+
+icat.dumpfile.register_backend("YAML", YAMLDumpFileReader, YAMLDumpFileWriter)
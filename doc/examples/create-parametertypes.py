@@ -40,16 +40,11 @@ hzb = client.assertedSearch("Facility[name='HZB']")[0]
 parametertypes = []
 for pdata in parametertype_data:
     print("ParameterType: creating '%s' ..." % pdata['name'])
-    parametertype = client.new("parameterType")
-    parametertype.name = pdata['name']
-    parametertype.units = pdata['units']
-    parametertype.unitsFullName = pdata['unitsFullName']
-    parametertype.valueType = pdata['valueType']
-    parametertype.applicableToDatafile = True
-    parametertype.applicableToDataset = True
-    parametertype.applicableToSample = True
-    parametertype.applicableToInvestigation = True
-    parametertype.facility = hzb
+    parametertype = client.new("parameterType", facility=hzb,
+                               applicableToDatafile=True,
+                               applicableToDataset=True,
+                               applicableToSample=True,
+                               applicableToInvestigation=True,
+                               **pdata)
     parametertypes.append(parametertype)
 client.createMany(parametertypes)
-
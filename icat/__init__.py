@@ -0,0 +1,18 @@
+"""Python interface to ICAT and IDS
+
+This package provides a collection of modules for writing Python
+programs that access an `ICAT`_ service using the SOAP interface.  It
+is based on Suds and extends it with ICAT specific features.
+
+.. _ICAT: https://icatproject.org/
+"""
+
+__version__ = "UNKNOWN"
+
+#
+# Default import
+#
+
+from icat.client import *
+from icat.exception import *
+
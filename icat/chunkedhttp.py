@@ -25,7 +25,11 @@ use it only for older versions.
 .. _Issue 12319: https://bugs.python.org/issue12319
 """
 
+import errno
 import http.client
+import select
+import socket
+import threading
 import urllib.error
 import urllib.request
 
@@ -34,12 +38,27 @@ import urllib.request
 # servers will otherwise respond with a 411
 _METHODS_EXPECTING_BODY = {'PATCH', 'POST', 'PUT'}
 
+_CRLF = b"\r\n"
+_TERMINATOR = b"0\r\n\r\n"
+
+# Default size of the chunks read from a file body.
+DEFAULT_CHUNK_SIZE = 65536
+
+# Framed chunks are collected in a buffer and only passed on to
+# send() once the buffer exceeds this size.  This avoids a separate
+# write to the socket for each small chunk.
+FLUSH_THRESHOLD = 65536
+
+# Maximum number of connections per host kept by the handlers for
+# reuse.
+MAX_POOL_CONNECTIONS = 4
+
 def stringiterator(buffer):
     """Wrap a string in an iterator that yields it in one single chunk."""
     if len(buffer) > 0:
         yield buffer
 
-def fileiterator(f, chunksize=8192):
+def fileiterator(f, chunksize=DEFAULT_CHUNK_SIZE):
     """Yield the content of a file by chunks of a given size at a time."""
     while True:
         chunk = f.read(chunksize)
@@ -47,6 +66,35 @@ def fileiterator(f, chunksize=8192):
             break
         yield chunk
 
+def _is_connection_dropped(conn):
+    """Check whether an idle connection has been closed by the peer.
+
+    There should be nothing to read from an idle connection.  If the
+    socket is readable nevertheless, the server either closed the
+    connection or sent something unexpected.  Don't use the
+    connection in either case.
+    """
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+class HTTPResponse(http.client.HTTPResponse):
+    """Keep track of whether the response has been read completely.
+
+    The connection can only be reused for the next request if the
+    body of the previous response has been read to the end.
+    """
+
+    aborted = False
+
+    def close(self):
+        if not self.isclosed():
+            # closed before the end of the body has been reached.
+            self.aborted = True
+        super().close()
+
 class HTTPConnectionMixin:
     """Implement chunked transfer encoding in HTTP.
 
@@ -54,7 +102,23 @@ class HTTPConnectionMixin:
     or HTTPSConnection accordingly.
     """
 
-    def _send_request(self, method, url, body, headers):
+    response_class = HTTPResponse
+
+    def connect(self):
+        super().connect()
+        # Disable Nagle's algorithm.  We take care to pass the body to
+        # send() in reasonably large pieces ourselves, waiting for the
+        # ACK before sending the last small piece would only add a
+        # delay.  Newer Python versions do this in the standard
+        # library, older ones don't.  Might fail in OSs that don't
+        # implement TCP_NODELAY.
+        try:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError as e:
+            if e.errno != errno.ENOPROTOOPT:
+                raise
+
+    def _send_request(self, method, url, body, headers, encode_chunked=False):
         # This method is taken and modified from the Python 2.7
         # httplib.py to prevent it from trying to set a Content-length
         # header and to hook in our send_body() method.
@@ -87,22 +151,45 @@ class HTTPConnectionMixin:
         been sent before calling this method.
         """
         if body is not None:
+            if isinstance(body, str):
+                body = body.encode('ascii')
             if isinstance(body, bytes):
-                bodyiter = stringiterator(body)
-            elif isinstance(body, str):
-                bodyiter = stringiterator(body.encode('ascii'))
+                # The common case of a short body given as a string:
+                # send it in one go, without any iterator machinery.
+                if not chunked:
+                    self.send(body)
+                elif body:
+                    size = ("%x\r\n" % len(body)).encode('ascii')
+                    self.send(b"".join((size, body, _CRLF, _TERMINATOR)))
+                else:
+                    self.send(_TERMINATOR)
+                return
             elif hasattr(body, 'read'):
-                bodyiter = fileiterator(body)
+                bodyiter = fileiterator(body, DEFAULT_CHUNK_SIZE)
             elif hasattr(body, '__iter__'):
                 bodyiter = body
             else:
                 raise TypeError("expect either a string, a file, "
                                 "or an iterable")
             if chunked:
+                buf = bytearray()
                 for chunk in bodyiter:
-                    self.send(hex(len(chunk))[2:].encode('ascii') 
-                              + b"\r\n" + chunk + b"\r\n")
-                self.send(b"0\r\n\r\n")
+                    # Note: formatting bytes with % needs Python 3.5.
+                    buf += ("%x\r\n" % len(chunk)).encode('ascii')
+                    if len(chunk) >= FLUSH_THRESHOLD:
+                        # Large chunks are sent as they are, rather
+                        # than copying them into the buffer first.
+                        self.send(bytes(buf))
+                        buf.clear()
+                        self.send(chunk)
+                    else:
+                        buf += chunk
+                    buf += _CRLF
+                    if len(buf) >= FLUSH_THRESHOLD:
+                        self.send(bytes(buf))
+                        buf.clear()
+                buf += _TERMINATOR
+                self.send(bytes(buf))
             else:
                 for chunk in bodyiter:
                     self.send(chunk)
@@ -118,10 +205,139 @@ class HTTPHandlerMixin:
     """Internal helper class.
 
     This is designed as a mixin class to modify either HTTPHandler or
-    HTTPSHandler accordingly.  It overrides do_request_() inherited
-    from AbstractHTTPHandler.
+    HTTPSHandler accordingly.  It overrides do_request_() and
+    do_open() inherited from AbstractHTTPHandler.
+
+    In contrast to the standard handlers, connections are kept open
+    after the response has been read and reused for subsequent
+    requests to the same host.
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Idle connections, ready for reuse.
+        self._connections = {}
+        # Connections along with their response that is still being
+        # read.  They are moved to _connections once the response has
+        # been read completely.
+        self._pending = {}
+        self._connections_lock = threading.Lock()
+
+    def _collect_pending(self, key):
+        """Move the connections whose response has been read to the
+        end from the pending list to the pool of idle connections.
+
+        Must be called with the lock held.
+        """
+        pending = self._pending.get(key, [])
+        idle = self._connections.setdefault(key, [])
+        for h, r in list(pending):
+            if not r.isclosed():
+                # Still in use.
+                continue
+            pending.remove((h, r))
+            if r.aborted or not h.sock:
+                h.close()
+            else:
+                idle.append(h)
+        while len(idle) > MAX_POOL_CONNECTIONS:
+            # These connections are idle, so it is safe to close them.
+            idle.pop(0).close()
+
+    def _get_connection(self, key):
+        """Take a connection that is ready for reuse from the pool.
+        Return :const:`None` if there is none.
+        """
+        with self._connections_lock:
+            self._collect_pending(key)
+            idle = self._connections[key]
+            while idle:
+                h = idle.pop()
+                if _is_connection_dropped(h):
+                    h.close()
+                else:
+                    return h
+        return None
+
+    def _put_connection(self, key, h, r):
+        """Keep track of a connection, along with its current
+        response, in order to reuse it once the response has been
+        read.
+        """
+        with self._connections_lock:
+            pending = self._pending.setdefault(key, [])
+            pending.append((h, r))
+            while len(pending) > MAX_POOL_CONNECTIONS:
+                # Some callers never read the response.  Don't let the
+                # pending list grow without bounds, but just forget
+                # about the oldest connection rather than closing it:
+                # that would also close the response, that might
+                # still be read.
+                pending.pop(0)
+
+    def close(self):
+        """Close all idle connections.
+
+        Note that :meth:`urllib.request.OpenerDirector.close` does not
+        call this, it must be called on the handler explicitly.
+        Connections with a response that is still being read are left
+        alone.
+        """
+        with self._connections_lock:
+            for key in list(self._pending.keys()):
+                self._collect_pending(key)
+            for conns in self._connections.values():
+                for h in conns:
+                    h.close()
+            self._connections.clear()
+            self._pending.clear()
+        super().close()
+
+    def do_open(self, http_class, req, **http_conn_args):
+        # The original method from AbstractHTTPHandler forces the
+        # connection to be closed after each request.  This is a
+        # modified version that takes the connection from the pool
+        # and puts it back there afterwards.
+        if req._tunnel_host:
+            # Don't bother to reuse connections tunneled through a
+            # proxy.
+            return super().do_open(http_class, req, **http_conn_args)
+
+        host = req.host
+        if not host:
+            raise urllib.error.URLError('no host given')
+
+        key = (http_class, host, req.timeout)
+        h = self._get_connection(key)
+        if h is None:
+            h = http_class(host, timeout=req.timeout, **http_conn_args)
+        h.set_debuglevel(self._debuglevel)
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items()
+                        if k not in headers})
+        headers = {name.title(): val for name, val in headers.items()}
+
+        try:
+            try:
+                h.request(req.get_method(), req.selector, req.data, headers)
+            except OSError as err:
+                raise urllib.error.URLError(err)
+            r = h.getresponse()
+        except:
+            h.close()
+            raise
+
+        # If the server requested to close the connection,
+        # HTTPConnection already did that and there is no use in
+        # keeping it.
+        if h.sock:
+            self._put_connection(key, h, r)
+
+        r.url = req.get_full_url()
+        r.msg = r.reason
+        return r
+
     def do_request_(self, request):
         # The original method from AbstractHTTPHandler sets some
         # defaults that are unsuitable for our use case.  In
@@ -152,6 +368,8 @@ class HTTPHandlerMixin:
             sel_host, sel_path = splithost(sel)
         if not request.has_header('Host'):
             request.add_unredirected_header('Host', sel_host)
+        if not request.has_header('Connection'):
+            request.add_unredirected_header('Connection', 'keep-alive')
         for name, value in self.parent.addheaders:
             name = name.capitalize()
             if not request.has_header(name):
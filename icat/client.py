@@ -4,6 +4,7 @@ This is the only module that needs to be imported to use the icat.
 """
 
 import atexit
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
 from distutils.version import StrictVersion as Version
 import logging
 import os
@@ -152,6 +153,8 @@ class Client(suds.client.Client):
             warn(ClientVersionWarning(self.apiversion, "too old"))
         self.entityInfoCache = {}
         self.typemap = getTypeMap(self)
+        self._beanmap = { c.BeanName:c for c in self.typemap.values()
+                          if c.BeanName }
         self.ids = None
         self.sessionId = None
         self.autoLogout = True
@@ -249,19 +252,7 @@ class Client(suds.client.Client):
                                       % instancetype)
         elif isinstance(obj, str):
             # obj is the name of an instance type, create the instance
-            instancetype = obj
-            try:
-                Class = self.typemap[instancetype]
-            except KeyError:
-                raise EntityTypeError("Invalid instance type '%s'." 
-                                      % instancetype)
-            instance = self.factory.create(instancetype)
-            # The factory creates a whole tree of dummy objects for
-            # all relationships of the instance object and the
-            # relationships of the related objects and so on.  These
-            # dummy objects are of no use, discard them.
-            for r in (Class.InstRel | Class.InstMRel):
-                delattr(instance, r)
+            return self.getEntityConstructor(obj)(**kwargs)
         elif obj is None:
             return None
         else:
@@ -276,13 +267,57 @@ class Client(suds.client.Client):
 
         return Class(self, instance, **kwargs)
 
+    def getEntityConstructor(self, instancetype):
+        """Return a function that creates new entity objects of one type.
+
+        Calling the function returned with some keyword arguments is
+        equivalent to calling :meth:`~icat.client.Client.new` with
+        instancetype and these keyword arguments.  But the instance
+        type is looked up and checked only once in advance.  This is
+        useful to create many objects of the same type.
+
+        >>> newKeyword = client.getEntityConstructor("keyword")
+        >>> kws = [ newKeyword(name=k, investigation=inv) for k in keywords ]
+
+        :param instancetype: the name of an instance type.
+        :type instancetype: :class:`str`
+        :return: a function that creates a new entity object from
+            keyword arguments.
+        :raise EntityTypeError: if instancetype is not a valid name
+            of an entity type.
+
+        .. versionadded:: 1.0.0
+        """
+        try:
+            Class = self.typemap[instancetype]
+        except KeyError:
+            raise EntityTypeError("Invalid instance type '%s'." 
+                                  % instancetype)
+        if Class is None:
+            raise EntityTypeError("Instance type '%s' is not supported." 
+                                  % instancetype)
+        if Class.BeanName is None:
+            raise EntityTypeError("Refuse to create an instance of "
+                                  "abstract type '%s'." % instancetype)
+        create = self.factory.create
+        rels = Class._AllRel
+        def construct(**kwargs):
+            instance = create(instancetype)
+            # The factory creates a whole tree of dummy objects for
+            # all relationships of the instance object and the
+            # relationships of the related objects and so on.  These
+            # dummy objects are of no use, discard them.
+            for r in rels:
+                delattr(instance, r)
+            return Class(self, instance, **kwargs)
+        return construct
+
     def getEntityClass(self, name):
         """Return the Entity class corresponding to a BeanName.
         """
-        for c in self.typemap.values():
-            if name == c.BeanName:
-                return c
-        else:
+        try:
+            return self._beanmap[name]
+        except KeyError:
             raise EntityTypeError("Invalid entity type '%s'." % name)
 
     def getEntity(self, obj):
@@ -648,6 +683,84 @@ class Client(suds.client.Client):
             objindex[key] = obj
         return obj
 
+    def searchUniqueKeys(self, keys, objindex, chunksize=100):
+        """Search the objects that belong to a collection of unique keys.
+
+        This is a bulk version of :meth:`searchUniqueKey`, meant to
+        fill the cache objindex in advance using as few search calls
+        as possible.  Keys that differ only in one string attribute
+        are searched together in one query.  Keys that do not fit this
+        pattern or that are not found are silently skipped, a
+        subsequent call of :meth:`searchUniqueKey` will take care of
+        them.
+
+        :param keys: the unique keys of the objects to search for.
+        :type keys: iterable of :class:`str`
+        :param objindex: cache of entity objects.  The objects found
+            will be added to this index.
+        :type objindex: :class:`dict`
+        :param chunksize: maximum number of keys to search for in one
+            query.
+        :type chunksize: :class:`int`
+        :raise ValueError: if any key is not well formed.
+
+        .. versionadded:: 1.0.0
+        """
+        groups = {}
+        fieldmap = {}
+        for key in keys:
+            if key in objindex:
+                continue
+            us = key.index('_')
+            beanname = key[:us]
+            av = parse_attr_val(key[us+1:])
+            try:
+                fields = fieldmap[beanname]
+            except KeyError:
+                info = self.getEntityInfo(beanname)
+                fields = { f.name:f for f in info.fields }
+                fieldmap[beanname] = fields
+            vattr = None
+            rels = []
+            for attr in sorted(av.keys()):
+                f = fields.get(attr)
+                if f is None:
+                    break
+                elif f.relType == "ATTRIBUTE":
+                    if vattr is not None or f.type != "String":
+                        break
+                    vattr = attr
+                elif f.relType == "ONE":
+                    rk = str("%s_%s" % (f.type, av[attr]))
+                    rels.append((attr, rk))
+                else:
+                    break
+            else:
+                if vattr is None:
+                    continue
+                value = simpleqp_unquote(av[vattr])
+                if "'" in value:
+                    continue
+                gk = (beanname, vattr, tuple(rels))
+                groups.setdefault(gk, {})[value] = key
+        for (beanname, vattr, rels), keymap in groups.items():
+            query = Query(self, beanname)
+            try:
+                for attr, rk in rels:
+                    ro = self.searchUniqueKey(rk, objindex)
+                    query.addConditions({"%s.id" % attr:"= %d" % ro.id})
+            except SearchResultError:
+                continue
+            values = sorted(keymap.keys())
+            for i in range(0, len(values), chunksize):
+                q = query.copy()
+                vals = ", ".join("'%s'" % v for v in values[i:i+chunksize])
+                q.addConditions({vattr:"IN (%s)" % vals})
+                for obj in self.search(q):
+                    key = keymap.get(getattr(obj, vattr))
+                    if key is not None:
+                        objindex[key] = obj
+
     def searchMatching(self, obj, includes=None):
         """Search the matching object.
 
@@ -799,6 +912,67 @@ class Client(suds.client.Client):
 
         if not self.ids:
             raise RuntimeError("no IDS.")
+        self._check_put_datafile(datafile)
+        dfid = self._putData(infile, datafile)
+        return self.get(datafile.BeanName, dfid)
+
+    def putDataMany(self, data, parallel=4):
+        """Upload several datafiles to IDS concurrently.
+
+        This is equivalent to calling
+        :meth:`~icat.client.Client.putData` for each item in `data`,
+        but up to `parallel` uploads are run at the same time in
+        separate threads.  This may considerably speed up uploading
+        many files if the throughput of a single connection is
+        limited by the network latency rather than by the bandwidth.
+
+        :param data: pairs of `infile` and `datafile`, see
+            :meth:`~icat.client.Client.putData` for the meaning of
+            these.
+        :type data: iterable of :class:`tuple`
+        :param parallel: maximum number of concurrent uploads.
+        :type parallel: :class:`int`
+        :return: The Datafile objects created by IDS, in the same
+            order as the items in `data`.
+        :rtype: :class:`list` of :class:`icat.entity.Entity`
+
+        .. note::
+           Unlike :meth:`~icat.client.Client.createMany`, this is not
+           an all-or-nothing operation.  If one upload fails, the
+           uploads not yet started are cancelled, those in progress
+           are waited for, and then the exception of the first failed
+           item in `data` is raised.  The Datafiles successfully
+           uploaded so far are not removed again and are not returned.
+           The caller may look them up in ICAT by dataset and name if
+           needed.
+
+        .. versionadded:: 1.0.0
+        """
+        if not self.ids:
+            raise RuntimeError("no IDS.")
+        data = list(data)
+        for infile, datafile in data:
+            self._check_put_datafile(datafile)
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            futures = [executor.submit(self._putData, *d) for d in data]
+            try:
+                wait(futures, return_when=FIRST_EXCEPTION)
+            finally:
+                # Cancel the uploads not yet started.  Those that are
+                # running are waited for when leaving the with block.
+                for f in futures:
+                    f.cancel()
+        for f in futures:
+            if not f.cancelled() and f.exception() is not None:
+                raise f.exception()
+        dfids = [f.result() for f in futures]
+        return [self.get(datafile.BeanName, dfid)
+                for (infile, datafile), dfid in zip(data, dfids)]
+
+    def _check_put_datafile(self, datafile):
+        """Verify that a datafile has all attributes set needed for
+        :meth:`~icat.client.Client.putData`.
+        """
         if not datafile.name:
             raise ValueError("datafile.name is not set.")
         if not datafile.dataset or not datafile.dataset.id:
@@ -806,6 +980,10 @@ class Client(suds.client.Client):
         if not datafile.datafileFormat or not datafile.datafileFormat.id:
             raise ValueError("datafile.datafileFormat is not set.")
 
+    def _putData(self, infile, datafile):
+        """Upload a datafile to IDS and return the id of the Datafile
+        object created by IDS.
+        """
         if not hasattr(infile, 'read'):
             # We got a file name as infile.  Open the file and
             # recursively call the method again with the open file
@@ -820,7 +998,7 @@ class Client(suds.client.Client):
                                 type(infile)) from None
             else:
                 with infile.open('rb') as f:
-                    return self.putData(f, datafile)
+                    return self._putData(f, datafile)
 
         modTime = ms_timestamp(datafile.datafileModTime)
         if not modTime:
@@ -837,11 +1015,10 @@ class Client(suds.client.Client):
         if not createTime:
             createTime = modTime
 
-        dfid = self.ids.put(infile, datafile.name, 
+        return self.ids.put(infile, datafile.name, 
                             datafile.dataset.id, datafile.datafileFormat.id, 
                             datafile.description, datafile.doi, 
                             createTime, modTime)
-        return self.get(datafile.BeanName, dfid)
 
     def getData(self, objs, compressFlag=False, zipFlag=False, outname=None, 
                 offset=0):
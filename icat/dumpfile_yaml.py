@@ -2,9 +2,17 @@
 """
 
 import datetime
+import io
 import yaml
 import icat
 import icat.dumpfile
+import icat.entity
+try:
+    # Use the libyaml based loader if available, it is considerably
+    # faster than the pure Python one.
+    from yaml import CSafeLoader as _YLoader
+except ImportError:
+    from yaml import SafeLoader as _YLoader
 try:
     utc = datetime.timezone.utc
 except AttributeError:
@@ -14,6 +22,25 @@ except AttributeError:
     except ImportError:
         utc = None
 
+_datetime = datetime.datetime
+_SORTKEY = icat.entity.Entity.__sortkey__
+
+
+class _YDumper(yaml.SafeDumper):
+    """The YAML dumper used to write data files.
+
+    Note that we deliberately do not base this on the libyaml based
+    dumper: it formats long mapping keys differently, so the output
+    would depend on whether libyaml is installed or not.
+
+    The data written never contains the same object twice, so there
+    is no need to keep track of the objects represented in order to
+    detect aliases.
+    """
+
+    def ignore_aliases(self, data):
+        return True
+
 
 # List of entity types.  This defines in particular the order in which
 # the types must be restored.
@@ -81,24 +108,61 @@ class YAMLDumpFileReader(icat.dumpfile.DumpFileReader):
         super().__init__(client, infile)
         self.insttypemap = { c.BeanName:t 
                              for t,c in self.client.typemap.items() }
+        self.mreltypemap = {}
+
+    def _getmreltype(self, cls, attr):
+        """Return the instance type of the objects related to entity
+        class cls in the one to many relation attr.
+
+        Cache the result in mreltypemap to avoid querying the entity
+        info for each object.
+        """
+        k = (cls.BeanName, attr)
+        try:
+            return self.mreltypemap[k]
+        except KeyError:
+            rtype = self.insttypemap[cls.getAttrInfo(self.client, attr).type]
+            self.mreltypemap[k] = rtype
+            return rtype
+
+    def _collectkeys(self, d, cls, keys):
+        """Add the keys of all objects referenced from a dict of
+        attributes to the set keys.
+        """
+        for k, v in d.items():
+            attr = cls.AttrAlias.get(k, k)
+            if attr in cls.InstRel:
+                keys.add(v)
+            elif attr in cls.InstMRel:
+                rcls = self.client.typemap[self._getmreltype(cls, attr)]
+                for rd in v:
+                    self._collectkeys(rd, rcls, keys)
 
     def _dict2entity(self, d, objtype, objindex):
         """Create an entity object from a dict of attributes."""
         obj = self.client.new(objtype)
-        for k in d:
-            attr = k
-            if attr in obj.AttrAlias:
-                attr = obj.AttrAlias[attr]
-            if attr in obj.InstAttr:
-                setattr(obj, attr, d[k])
-            elif attr in obj.InstRel:
-                robj = self.client.searchUniqueKey(d[k], objindex)
+        # The attribute sets are frozensets already, just avoid
+        # looking them up in the class for each attribute.
+        attrAlias = obj.AttrAlias
+        instAttr = obj.InstAttr
+        instRel = obj.InstRel
+        instMRel = obj.InstMRel
+        instance = obj.instance
+        for k, v in d.items():
+            attr = attrAlias.get(k, k)
+            if attr in instAttr:
+                # Entity.__setattr__() would do nothing else than
+                # this, but only after some more checks.
+                setattr(instance, attr, v)
+            elif attr in instRel:
+                robj = self.client.searchUniqueKey(v, objindex)
                 setattr(obj, attr, robj)
-            elif attr in obj.InstMRel:
-                rtype = self.insttypemap[obj.getAttrType(attr)]
-                for rd in d[k]:
+            elif attr in instMRel:
+                rtype = self._getmreltype(type(obj), attr)
+                rlist = getattr(obj, attr)
+                for rd in v:
                     robj = self._dict2entity(rd, rtype, objindex)
-                    getattr(obj, attr).append(robj)
+                    rlist.append(robj)
             else:
                 raise ValueError("invalid attribute '%s' in '%s'" 
                                  % (k, objtype))
@@ -109,7 +173,7 @@ class YAMLDumpFileReader(icat.dumpfile.DumpFileReader):
         """
         # yaml.load_all() returns a generator that yield one chunk
         # (YAML document) from the file in each iteration.
-        return yaml.safe_load_all(self.infile)
+        return yaml.load_all(self.infile, Loader=_YLoader)
 
     def getobjs_from_data(self, data, objindex):
         """Iterate over the objects in a data chunk.
@@ -121,11 +185,25 @@ class YAMLDumpFileReader(icat.dumpfile.DumpFileReader):
         for name in data.keys():
             if name not in entitytypes:
                 raise RuntimeError("Unknown entry %s in the data." % name)
-        for name in entitytypes:
-            if name in data:
-                for key in sorted(data[name].keys()):
-                    obj = self._dict2entity(data[name][key], name, objindex)
-                    yield key, obj
+        present = [name for name in entitytypes if name in data]
+        # Search the referenced objects in advance in a few bulk
+        # calls rather than one by one.  Skip those that are defined
+        # in this chunk, they do not exist yet.
+        keys = set()
+        for name in present:
+            cls = self.client.typemap[name]
+            for d in data[name].values():
+                self._collectkeys(d, cls, keys)
+        for name in present:
+            keys.difference_update(data[name].keys())
+        keys.difference_update(objindex.keys())
+        if keys:
+            self.client.searchUniqueKeys(keys, objindex)
+        for name in present:
+            objs = data[name]
+            for key in sorted(objs):
+                obj = self._dict2entity(objs[key], name, objindex)
+                yield key, obj
 
 
 # ------------------------------------------------------------
@@ -146,50 +224,92 @@ class YAMLDumpFileWriter(icat.dumpfile.DumpFileWriter):
     """File mode suitable for this backend.
     """
 
+    bufsize = 1048576
+    """Size of the buffer to collect the output in before writing it
+    to the data file.
+    """
+
     def __init__(self, client, outfile):
         super().__init__(client, outfile)
         self.data = {}
 
     def _entity2dict(self, obj, keyindex):
         """Convert an entity object to a dict."""
+        # Bind some frequently used objects to local names, this
+        # method is called for each and every object in the dump.
+        datetime_type = _datetime
+        sortkey = _SORTKEY
+        typemap = self.client.typemap
+        # Related objects in one to many relations are converted to
+        # dicts embedded in the dict of their parent.  Rather than
+        # recursing into them, keep a list of pending objects, each
+        # along with the (yet empty) dict it is to be converted into.
         d = {}
-        for attr in obj.InstAttr:
-            if attr == 'id':
-                continue
-            v = getattr(obj, attr, None)
-            if v is None:
-                continue
-            elif isinstance(v, bool):
-                pass
-            elif isinstance(v, int):
-                v = int(v)
-            elif isinstance(v, datetime.datetime):
-                if v.tzinfo is not None and v.tzinfo.utcoffset(v) is not None:
-                    # v has timezone info.  This will be the timezone set
-                    # in the ICAT server.  Convert it to UTC to avoid
-                    # dependency of server settings in the dumpfile.
-                    # Assume v.isoformat() to have a valid timezone
-                    # suffix.
-                    if utc:
-                        v = v.astimezone(utc)
-                    v = v.isoformat()
+        pending = [(obj, d)]
+        while pending:
+            obj, od = pending.pop()
+            # The values of the attributes are stored in the
+            # instance, read them directly from there rather than
+            # going through Entity.__getattr__() for each of them.
+            instance = obj.instance
+            for attr in obj.InstAttr:
+                if attr == 'id':
+                    continue
+                v = getattr(instance, attr, None)
+                if v is None:
+                    continue
+                elif isinstance(v, str):
+                    # The most common case, so test it first.  Suds
+                    # may yield a subclass of str, but the dumper
+                    # only knows how to represent str.
+                    v = str(v)
+                elif isinstance(v, bool):
+                    pass
+                elif isinstance(v, int):
+                    v = int(v)
+                elif isinstance(v, datetime_type):
+                    if (v.tzinfo is not None and
+                        v.tzinfo.utcoffset(v) is not None):
+                        # v has timezone info.  This will be the
+                        # timezone set in the ICAT server.  Convert it
+                        # to UTC to avoid dependency of server
+                        # settings in the dumpfile.  Assume
+                        # v.isoformat() to have a valid timezone
+                        # suffix.
+                        if utc:
+                            v = v.astimezone(utc)
+                        v = v.isoformat()
+                    else:
+                        # v has no timezone info, assume it to be UTC,
+                        # append the corresponding timezone suffix.
+                        v = v.isoformat() + 'Z'
                 else:
-                    # v has no timezone info, assume it to be UTC, append
-                    # the corresponding timezone suffix.
-                    v = v.isoformat() + 'Z'
-            else:
-                v = str(v)
-            d[attr] = v
-        for attr in obj.InstRel:
-            o = getattr(obj, attr, None)
-            if o is not None:
-                d[attr] = o.getUniqueKey(keyindex=keyindex)
-        for attr in obj.InstMRel:
-            if len(getattr(obj, attr)) > 0:
-                d[attr] = []
-                for o in sorted(getattr(obj, attr), 
-                                key=icat.entity.Entity.__sortkey__):
-                    d[attr].append(self._entity2dict(o, keyindex=keyindex))
+                    v = str(v)
+                od[attr] = v
+            for attr in obj.InstRel:
+                ri = getattr(instance, attr, None)
+                if ri is None:
+                    continue
+                # Related objects are typically referenced many times
+                # and their key is then found in keyindex.  Look it
+                # up there directly, so that we don't need to create
+                # an entity object for the related instance each time.
+                kid = (typemap[ri.__class__.__name__].BeanName,
+                       getattr(ri, 'id', None))
+                if keyindex is not None and kid in keyindex:
+                    od[attr] = keyindex[kid]
+                else:
+                    o = self.client.new(ri)
+                    od[attr] = o.getUniqueKey(keyindex=keyindex)
+            for attr in obj.InstMRel:
+                # Check the list of related instances first, so that
+                # empty relations need not be wrapped in an EntityList.
+                if getattr(instance, attr, None):
+                    rl = od[attr] = []
+                    for o in sorted(getattr(obj, attr), key=sortkey):
+                        rd = {}
+                        rl.append(rd)
+                        pending.append((o, rd))
         return d
 
     def head(self):
@@ -204,6 +324,53 @@ class YAMLDumpFileWriter(icat.dumpfile.DumpFileWriter):
 """ % (date, self.client.url, self.client.apiversion, icat.__version__)
         self.outfile.write(head)
 
+    def _dumpdata(self):
+        """Write the current data chunk to the data file.
+
+        The result is the same as from yaml.dump(self.data), but we
+        emit the enclosing mappings ourselves and let the dumper
+        represent only one object at a time.  This avoids having the
+        YAML node graph for the complete chunk in memory at once.
+
+        The dumper writes its output in many small pieces.  Collect
+        them in a buffer and only write that to the data file once it
+        is full.
+        """
+        buf = io.StringIO()
+        def flush():
+            self.outfile.write(buf.getvalue())
+            buf.seek(0)
+            buf.truncate()
+        def dumpnode(dumper, data):
+            node = dumper.represent_data(data)
+            dumper.anchor_node(node)
+            dumper.serialize_node(node, None, None)
+            dumper.serialized_nodes = {}
+            dumper.anchors = {}
+            if buf.tell() >= self.bufsize:
+                flush()
+        dumper = _YDumper(buf, default_flow_style=False)
+        try:
+            dumper.open()
+            dumper.emit(yaml.DocumentStartEvent(explicit=True))
+            dumper.emit(yaml.MappingStartEvent(None, None, True,
+                                               flow_style=False))
+            for tag in sorted(self.data):
+                dumpnode(dumper, tag)
+                dumper.emit(yaml.MappingStartEvent(None, None, True,
+                                                   flow_style=False))
+                objs = self.data[tag]
+                for key in sorted(objs):
+                    dumpnode(dumper, key)
+                    dumpnode(dumper, objs[key])
+                dumper.emit(yaml.MappingEndEvent())
+            dumper.emit(yaml.MappingEndEvent())
+            dumper.emit(yaml.DocumentEndEvent(explicit=False))
+            dumper.close()
+            flush()
+        finally:
+            dumper.dispose()
+
     def startdata(self):
         """Start a new data chunk.
 
@@ -211,8 +378,7 @@ class YAMLDumpFileWriter(icat.dumpfile.DumpFileWriter):
         file.
         """
         if self.data:
-            yaml.dump(self.data, self.outfile, 
-                      default_flow_style=False, explicit_start=True)
+            self._dumpdata()
         self.data = {}
 
     def writeobj(self, key, obj, keyindex):
@@ -227,6 +393,7 @@ class YAMLDumpFileWriter(icat.dumpfile.DumpFileWriter):
     def finalize(self):
         """Finalize the data file."""
         self.startdata()
+        self.outfile.flush()
 
 
 icat.dumpfile.register_backend("YAML", YAMLDumpFileReader, YAMLDumpFileWriter)
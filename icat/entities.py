@@ -20,16 +20,19 @@ class GroupingMixin:
     """Mixin class to define custom methods for Grouping objects.
     """
 
+    __slots__ = ()
+
     def addUsers(self, users):
         """Add users to the group.
         """
-        ugs = []
-        uids = set()
+        # Drop duplicates, keyed by the user's id.  Keep the first
+        # occurrence of each user.
+        uniqueUsers = {}
         for u in users:
-            if u.id in uids:
-                continue
-            ugs.append(self.client.new('userGroup', user=u, grouping=self))
-            uids.add(u.id)
+            uniqueUsers.setdefault(u.id, u)
+        newUserGroup = self.client.getEntityConstructor('userGroup')
+        ugs = [ newUserGroup(user=u, grouping=self)
+                for u in uniqueUsers.values() ]
         if ugs:
             self.client.createMany(ugs)
 
@@ -51,13 +54,15 @@ class InstrumentMixin:
     """Mixin class to define custom methods for Instrument objects.
     """
 
+    __slots__ = ()
+
     def addInstrumentScientists(self, users):
         """Add instrument scientists to the instrument.
         """
-        iss = []
-        for u in users:
-            iss.append(self.client.new('instrumentScientist', 
-                                       instrument=self, user=u))
+        newInstrumentScientist = \
+            self.client.getEntityConstructor('instrumentScientist')
+        iss = [ newInstrumentScientist(instrument=self, user=u)
+                for u in users ]
         if iss:
             self.client.createMany(iss)
 
@@ -79,6 +84,8 @@ class InvestigationMixin:
     """Mixin class to define custom methods for Investigation objects.
     """
 
+    __slots__ = ()
+
     def addInstrument(self, instrument):
         """Add an instrument to the investigation.
         """
@@ -89,19 +96,18 @@ class InvestigationMixin:
     def addKeywords(self, keywords):
         """Add keywords to the investigation.
         """
-        kws = []
-        for k in keywords:
-            kws.append(self.client.new('keyword', name=k, investigation=self))
+        newKeyword = self.client.getEntityConstructor('keyword')
+        kws = [ newKeyword(name=k, investigation=self) for k in keywords ]
         if kws:
             self.client.createMany(kws)
 
     def addInvestigationUsers(self, users, role='Investigator'):
         """Add investigation users.
         """
-        ius = []
-        for u in users:
-            ius.append(self.client.new('investigationUser', 
-                                       investigation=self, user=u, role=role))
+        newInvestigationUser = \
+            self.client.getEntityConstructor('investigationUser')
+        ius = [ newInvestigationUser(investigation=self, user=u, role=role)
+                for u in users ]
         if ius:
             self.client.createMany(ius)
 
@@ -111,6 +117,8 @@ class Investigation44Mixin(InvestigationMixin):
     ICAT version 4.4.0 and later.
     """
 
+    __slots__ = ()
+
     def addInvestigationGroup(self, group, role=None):
         """Add an investigation group.
         """
@@ -128,6 +136,18 @@ _parent = {
     'SampleParameter': 'parameter',
 }
 
+_frozensets = {}
+
+def _internset(names):
+    """Return a frozenset of the names.
+
+    Many entity classes have the same set of attributes or relations.
+    Share equal sets between all classes, including the classes
+    created for other clients, rather than keeping a copy each.
+    """
+    s = frozenset(names)
+    return _frozensets.setdefault(s, s)
+
 _extra_attrs = {
     'Parameter': [
         (None, {
@@ -235,7 +255,7 @@ def getTypeMap(client):
         except KeyError:
             parent = Entity
         info = client.getEntityInfo(beanName)
-        attrs = { 'BeanName': str(beanName), }
+        attrs = { 'BeanName': str(beanName), '__slots__': (), }
         try:
             attrs['__doc__'] = str(info.classComment)
         except AttributeError:
@@ -260,13 +280,13 @@ def getTypeMap(client):
                 instMRel.append(str(field['name']))
             else:
                 raise InternalError("Invalid relType '%s'" % field['relType'])
-        instAttr = frozenset(instAttr)
+        instAttr = _internset(instAttr)
         if instAttr != parent.InstAttr:
             attrs['InstAttr'] = instAttr
-        instRel = frozenset(instRel)
+        instRel = _internset(instRel)
         if instRel != parent.InstRel:
             attrs['InstRel'] = instRel
-        instMRel = frozenset(instMRel)
+        instMRel = _internset(instMRel)
         if instMRel != parent.InstMRel:
             attrs['InstMRel'] = instMRel
         mixin = None
@@ -2,6 +2,7 @@
 """
 
 import re
+import sys
 from warnings import warn
 import suds.sudsobject
 from icat.listproxy import ListProxy
@@ -11,7 +12,75 @@ from icat.helper import simpleqp_quote
 __all__ = ['Entity']
 
 
-class Entity():
+class _EntityMeta(type):
+    """Metaclass of :class:`icat.entity.Entity`.
+
+    Compute some unions of the attribute sets of each entity class
+    that are frequently needed, as well as the relTypes of the sort
+    and constraint attributes, once, when the class is created, rather
+    than each time they are used.  They are computed again if one of
+    the attributes they derive from is set later on.  Also intern the
+    BeanName.
+    """
+
+    _attrSetNames = frozenset(['InstAttr', 'MetaAttr', 'InstRel', 'InstMRel',
+                               'Constraint', 'SortAttrs'])
+
+    def __init__(cls, name, bases, attrs):
+        super().__init__(name, bases, attrs)
+        # BeanName is used as a key in many lookups, intern it so
+        # that these can compare by identity.
+        if attrs.get('BeanName'):
+            cls.BeanName = sys.intern(attrs['BeanName'])
+        cls._initAttrSets()
+
+    def __setattr__(cls, name, value):
+        if name == 'BeanName' and value:
+            value = sys.intern(value)
+        super().__setattr__(name, value)
+        if name in _EntityMeta._attrSetNames:
+            cls._initAttrSets()
+
+    def _initAttrSets(cls):
+        """Compute the unions of the attribute sets for the class and
+        all its subclasses.
+        """
+        # Subclasses that do not override any of the attribute sets,
+        # such as the concrete Parameter classes for InstAttr, share
+        # the unions inherited from their parent.
+        d = cls.__dict__
+        if 'InstAttr' in d or 'InstRel' in d:
+            cls._AttrRel = cls.InstAttr | cls.InstRel
+        if 'InstAttr' in d or 'MetaAttr' in d:
+            cls._DataAttr = cls.InstAttr | cls.MetaAttr
+        if 'InstRel' in d or 'InstMRel' in d:
+            cls._AllRel = cls.InstRel | cls.InstMRel
+        # The attributes of SortAttrs and Constraint respectively,
+        # each along with its relType.
+        cls._SortKeyAttrs = cls._getRelTypes(cls.SortAttrs or cls.Constraint)
+        cls._ConstraintAttrs = cls._getRelTypes(cls.Constraint)
+        for subcls in cls.__subclasses__():
+            subcls._initAttrSets()
+
+    def _getRelTypes(cls, attrs):
+        """Return a tuple of pairs of attribute name and relType.
+
+        The relType is :const:`None` if the attribute is not known.
+        """
+        relTypes = []
+        for attr in attrs:
+            if attr in cls.InstAttr:
+                relTypes.append((attr, "ATTRIBUTE"))
+            elif attr in cls.InstRel:
+                relTypes.append((attr, "ONE"))
+            elif attr in cls.InstMRel:
+                relTypes.append((attr, "MANY"))
+            else:
+                relTypes.append((attr, None))
+        return tuple(relTypes)
+
+
+class Entity(metaclass=_EntityMeta):
     """The base of the classes representing the entities in the ICAT schema.
 
     Entity is the abstract base for a hierarchy of classes
@@ -26,6 +95,13 @@ class Entity():
     transparent conversion between Entity objects and Suds instances
     is performed where appropriate.
     """
+    # Store client and instance in slots.  The instance dict is only
+    # needed for the cached lists of one to many relations, so it
+    # does not get allocated for objects that never access these.
+    # Keep support for weak references.  Subclasses should set
+    # __slots__ to the empty tuple.
+    __slots__ = ('client', 'instance', '__dict__', '__weakref__')
+
     BeanName = None
     """Name of the entity in the ICAT schema, :const:`None` for abstract
     classes."""
@@ -45,6 +121,9 @@ class Entity():
     """Map of alias names for attributes and relationships."""
     SortAttrs = None
     """List of attributes used for sorting.  Uses Constraint if :const:`None`."""
+    # The class attributes _AttrRel, _DataAttr, and _AllRel holding
+    # some unions of the attribute sets above, as well as
+    # _SortKeyAttrs and _ConstraintAttrs are set by _EntityMeta.
     validate = None
     """Hook to add a pre create validation method.
 
@@ -207,12 +286,16 @@ class Entity():
                                  (type(self).__name__, attr))
 
     def __delattr__(self, attr):
-        if attr in (self.InstAttr | self.InstRel):
+        if attr in self._AttrRel:
             if hasattr(self.instance, attr):
                 delattr(self.instance, attr)
         elif attr in self.InstMRel:
-            if attr in self.__dict__:
+            # Delete the cached list, if any.  Avoid looking at
+            # self.__dict__ for this, as that would allocate it.
+            try:
                 super().__delattr__(attr)
+            except AttributeError:
+                pass
             if hasattr(self.instance, attr):
                 delattr(self.instance, attr)
         elif attr in self.AttrAlias:
@@ -245,7 +328,7 @@ class Entity():
         'Investigation B'
         """
         cobj = self.client.new(self.instance.__class__.__name__)
-        for attr in (self.InstAttr | self.InstRel):
+        for attr in self._AttrRel:
             value = getattr(self.instance, attr, None)
             setattr(cobj.instance, attr, value)
         for attr in self.InstMRel:
@@ -292,22 +375,22 @@ class Entity():
 
         >>> l.sort(key=icat.entity.Entity.__sortkey__)
         """
-        sortattrs = self.SortAttrs or self.Constraint
         s = [ self.BeanName ]
-        for attr in sortattrs:
-            v = getattr(self, attr, None)
-            if attr in self.InstAttr:
+        for attr, relType in self._SortKeyAttrs:
+            if relType == "ATTRIBUTE":
+                v = getattr(self.instance, attr, None)
                 if v is None:
                     v = ''
                 else:
                     v = str(v)
-            elif attr in self.InstRel:
+            elif relType == "ONE":
+                v = getattr(self, attr, None)
                 if v is None:
                     v = []
                 else:
                     v = v.__sortkey__()
-            elif attr in self.InstMRel:
-                v = [ r.__sortkey__() for r in v ]
+            elif relType == "MANY":
+                v = [ r.__sortkey__() for r in getattr(self, attr) ]
                 v.sort()
             else:
                 raise InternalError("Invalid sorting attribute '%s' in %s."
@@ -319,7 +402,7 @@ class Entity():
         """Return a dict with the object's attributes.
         """
         d = {}
-        for a in self.InstAttr | self.MetaAttr:
+        for a in self._DataAttr:
             d[a] = getattr(self, a)
         return d
 
@@ -353,7 +436,7 @@ class Entity():
         you only need to keep the object's attributes but not the
         (possibly large) tree of related objects in local memory.
         """
-        for r in (self.InstRel | self.InstMRel):
+        for r in self._AllRel:
             delattr(self, r)
         
 
@@ -385,11 +468,12 @@ class Entity():
             return keyindex[kid]
 
         key = self.BeanName
-        for c in self.Constraint:
+        for c, relType in self._ConstraintAttrs:
             key += "_"
-            if c in self.InstAttr:
-                key += "%s-%s" % (c, simpleqp_quote(getattr(self, c, None)))
-            elif c in self.InstRel:
+            if relType == "ATTRIBUTE":
+                v = getattr(self.instance, c, None)
+                key += "%s-%s" % (c, simpleqp_quote(v))
+            elif relType == "ONE":
                 e = getattr(self, c, None)
                 if e:
                     ek = e.getUniqueKey(keyindex)
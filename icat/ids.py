@@ -82,7 +82,9 @@ class ChunkedFileReader():
     """An iterator that yields chunks of data read from a file.
     As a side effect, a checksum of the read data is calulated.
     """
-    def __init__(self, inputfile, chunksize=8192):
+    # The chunks are sent as they are using chunked transfer
+    # encoding, so the chunk size should not be too small.
+    def __init__(self, inputfile, chunksize=65536):
         self.inputfile = inputfile
         self.chunksize = chunksize
         self.crc32 = 0
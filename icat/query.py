@@ -394,13 +394,23 @@ class Query():
 
         :param includes: list of related objects to add to the INCLUDE
             clause.  A special value of "1" may be used to set (the
-            equivalent of) an "INCLUDE 1" clause.
+            equivalent of) an "INCLUDE 1" clause.  A special value of
+            "all" includes all objects directly related to the
+            entity, in many to one as well as in one to many
+            relations.
         :type includes: iterable of :class:`str`
         :raise ValueError: if any item in `includes` is not a related object.
+
+        .. versionchanged:: 1.0.0
+            add the special value "all".
         """
+        # The special values are taken from the entity class, so they
+        # are known to be related objects and need not be checked.
         if includes == "1":
-            includes = list(self.entity.InstRel)
-        if includes:
+            self.includes.update(self.entity.InstRel)
+        elif includes == "all":
+            self.includes.update(self.entity._AllRel)
+        elif includes:
             for iobj in includes:
                 for (pattr, attrInfo, rclass) in self._attrpath(iobj):
                     pass
@@ -442,9 +452,12 @@ class Query():
                       set(self.attributes) )
         subst = self._makesubst(joinattrs)
         if self.attributes:
+            # Comparing the version to a string needs to parse the
+            # latter, do it only once.
+            attrsubst = self.client.apiversion >= "4.7.0"
             attrs = []
             for a in self.attributes:
-                if self.client.apiversion >= "4.7.0":
+                if attrsubst:
                     attrs.append(self._dosubst(a, subst, False))
                 else:
                     # Old versions of icat.server do not accept
@@ -0,0 +1,249 @@
+"""Test module icat.chunkedhttp
+"""
+
+import http.client
+import http.server
+import io
+import socket
+import socketserver
+import threading
+import urllib.request
+import pytest
+import icat.chunkedhttp
+from icat.chunkedhttp import HTTPConnection
+
+
+class EchoRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Respond to GET with the path, echo the body of PUT requests.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            body = b""
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                chunk = self.rfile.read(size + 2)
+                if size == 0:
+                    return body
+                body += chunk[:size]
+        else:
+            return self.rfile.read(int(self.headers["Content-Length"]))
+
+    def do_GET(self):
+        if self.path.startswith("/big/"):
+            self._respond(b"x" * int(self.path[5:]))
+        else:
+            self._respond(self.path.encode('ascii'))
+
+    def do_PUT(self):
+        self._respond(self._read_body())
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn,
+                          http.server.HTTPServer):
+    """http.server.ThreadingHTTPServer is only available in Python 3.7
+    and newer.
+    """
+    daemon_threads = True
+
+
+@pytest.fixture(scope="module")
+def httpserver():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoRequestHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class RecordingHTTPConnection(HTTPConnection):
+    """An HTTPConnection that records the data sent instead of
+    writing it to a socket.
+    """
+    def __init__(self):
+        super().__init__("localhost")
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(data)
+
+
+def unchunk(data):
+    """Decode a body sent using chunked transfer encoding.
+    Return the list of chunks.
+    """
+    chunks = []
+    while True:
+        hdr, data = data.split(b"\r\n", 1)
+        size = int(hdr, 16)
+        if size == 0:
+            assert data == b"\r\n"
+            return chunks
+        chunks.append(data[:size])
+        assert data[size:size+2] == b"\r\n"
+        data = data[size+2:]
+
+
+def test_send_body_chunked_bytes():
+    """Send a bytes body using chunked transfer encoding.
+    """
+    conn = RecordingHTTPConnection()
+    conn.send_body(b"Hello world!", True)
+    assert conn.sent == [b"c\r\nHello world!\r\n0\r\n\r\n"]
+    conn = RecordingHTTPConnection()
+    conn.send_body("Hello world!", True)
+    assert conn.sent == [b"c\r\nHello world!\r\n0\r\n\r\n"]
+    conn = RecordingHTTPConnection()
+    conn.send_body(b"", True)
+    assert conn.sent == [b"0\r\n\r\n"]
+
+
+def test_send_body_chunked_iter():
+    """Send many small chunks: these should be coalesced into few
+    calls of send().
+    """
+    chunks = [("%05d" % i).encode('ascii') for i in range(1000)]
+    conn = RecordingHTTPConnection()
+    conn.send_body(iter(chunks), True)
+    assert len(conn.sent) == 1
+    assert unchunk(b"".join(conn.sent)) == chunks
+
+
+def test_send_body_chunked_flush():
+    """Send more data than fits into the buffer.
+    """
+    size = 3*icat.chunkedhttp.FLUSH_THRESHOLD + 17
+    data = bytes(i % 251 for i in range(size))
+    conn = RecordingHTTPConnection()
+    conn.send_body(io.BytesIO(data), True)
+    assert len(conn.sent) > 1
+    assert b"".join(unchunk(b"".join(conn.sent))) == data
+
+
+def test_send_body_chunked_large():
+    """Chunks of the flush threshold size or larger are sent directly
+    rather than being copied into the buffer.
+    """
+    size = icat.chunkedhttp.FLUSH_THRESHOLD
+    chunks = [b"a"*17, b"b"*size, b"c"*(2*size), b"d"*5]
+    conn = RecordingHTTPConnection()
+    conn.send_body(iter(chunks), True)
+    assert chunks[1] in conn.sent
+    assert chunks[2] in conn.sent
+    assert unchunk(b"".join(conn.sent)) == chunks
+
+
+def test_send_body_plain():
+    """Send a body as is.
+    """
+    conn = RecordingHTTPConnection()
+    conn.send_body(b"Hello world!", False)
+    assert b"".join(conn.sent) == b"Hello world!"
+    conn = RecordingHTTPConnection()
+    with pytest.raises(TypeError):
+        conn.send_body(42, False)
+
+
+def test_fileiterator():
+    """fileiterator() yields chunks of DEFAULT_CHUNK_SIZE by default.
+    """
+    size = 2*icat.chunkedhttp.DEFAULT_CHUNK_SIZE + 5
+    chunks = list(icat.chunkedhttp.fileiterator(io.BytesIO(b"x" * size)))
+    assert [len(c) for c in chunks] == [
+        icat.chunkedhttp.DEFAULT_CHUNK_SIZE,
+        icat.chunkedhttp.DEFAULT_CHUNK_SIZE,
+        5,
+    ]
+
+
+def test_connect_nodelay(monkeypatch):
+    """The connection disables Nagle's algorithm on the socket.
+
+    Newer Python versions already do this in the standard library, so
+    replace the inherited connect() to check that the mixin does it
+    on its own.
+    """
+    class RecordingSocket:
+        def __init__(self):
+            self.options = []
+        def setsockopt(self, *args):
+            self.options.append(args)
+    def connect(self):
+        self.sock = RecordingSocket()
+    monkeypatch.setattr(http.client.HTTPConnection, "connect", connect)
+    conn = HTTPConnection("localhost")
+    conn.connect()
+    assert conn.sock.options == [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+
+
+def test_handler_keepalive(httpserver):
+    """The handler reuses connections for subsequent requests.
+    """
+    host, port = httpserver.server_address
+    baseurl = "http://%s:%d" % (host, port)
+    handler = icat.chunkedhttp.HTTPHandler()
+    opener = urllib.request.build_opener(handler)
+    count = httpserver.connections
+    for i in range(3):
+        path = "/get/%d" % i
+        with opener.open(baseurl + path) as r:
+            assert r.read() == path.encode('ascii')
+    assert httpserver.connections == count + 1
+    data = bytes(i % 251 for i in range(100000))
+    req = urllib.request.Request(baseurl + "/put", data=io.BytesIO(data),
+                                 method="PUT")
+    req.add_header('Content-Type', 'application/octet-stream')
+    with opener.open(req) as r:
+        assert r.read() == data
+    assert httpserver.connections == count + 1
+    # A connection must not be reused if the previous response has
+    # not been read completely.
+    r = opener.open(baseurl + "/get/unread")
+    r.close()
+    with opener.open(baseurl + "/get/next") as r:
+        assert r.read() == b"/get/next"
+    assert httpserver.connections == count + 2
+    # Closing the handler closes the connections that are idle.
+    conns = [h for p in handler._pending.values() for h, r in p]
+    assert conns
+    handler.close()
+    assert all(h.sock is None for h in conns)
+
+
+def test_handler_pending_response(httpserver):
+    """Requests whose response is never read must not close the
+    connection of another response that is still being read.
+    """
+    host, port = httpserver.server_address
+    baseurl = "http://%s:%d" % (host, port)
+    size = 1000000
+    handler = icat.chunkedhttp.HTTPHandler()
+    opener = urllib.request.build_opener(handler)
+    r = opener.open("%s/big/%d" % (baseurl, size))
+    data = r.read(10)
+    unread = [opener.open(baseurl + "/get/unread")
+              for i in range(icat.chunkedhttp.MAX_POOL_CONNECTIONS + 2)]
+    data += r.read()
+    assert len(data) == size
+    for u in unread:
+        u.close()
+    r.close()
+    handler.close()
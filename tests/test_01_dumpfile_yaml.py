@@ -0,0 +1,46 @@
+"""Test the output of icat.dumpfile_yaml.
+
+YAMLDumpFileWriter does not call yaml.dump() on a data chunk, but
+feeds the dumper one object at a time.  Verify that this still yields
+exactly the same output as yaml.dump().
+"""
+
+import io
+import pytest
+import yaml
+import icat.dumpfile_yaml
+from conftest import gettestdata
+
+
+refdumps = ["icatdump-4.4.yaml", "icatdump-4.7.yaml", "icatdump-4.10.yaml"]
+
+def getchunks(fname):
+    with gettestdata(fname).open("rt") as f:
+        return [ d for d in yaml.safe_load_all(f) if d ]
+
+@pytest.mark.parametrize("fname", refdumps)
+def test_dumpdata(fname):
+    """Write the data chunks of a reference dump file and compare the
+    result with yaml.dump().
+    """
+    for data in getchunks(fname):
+        outfile = io.StringIO()
+        writer = icat.dumpfile_yaml.YAMLDumpFileWriter(None, outfile)
+        writer.data = data
+        writer.startdata()
+        assert outfile.getvalue() == yaml.dump(data, default_flow_style=False,
+                                               explicit_start=True)
+
+@pytest.mark.parametrize("fname", refdumps)
+def test_dumpdata_small_buffer(fname, monkeypatch):
+    """Same as test_dumpdata(), but force the output to be written in
+    many pieces.
+    """
+    monkeypatch.setattr(icat.dumpfile_yaml.YAMLDumpFileWriter, "bufsize", 64)
+    for data in getchunks(fname):
+        outfile = io.StringIO()
+        writer = icat.dumpfile_yaml.YAMLDumpFileWriter(None, outfile)
+        writer.data = data
+        writer.startdata()
+        assert outfile.getvalue() == yaml.dump(data, default_flow_style=False,
+                                               explicit_start=True)
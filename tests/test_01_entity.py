@@ -0,0 +1,126 @@
+"""Test the class attributes that icat.entity.Entity derives for each
+entity class.
+
+These tests do not need an ICAT server: the entity classes are
+defined here rather than generated from the schema.
+"""
+
+import sys
+import weakref
+from icat.entity import Entity
+
+
+class Mixin():
+    __slots__ = ()
+
+
+def mkclasses():
+    """Define some entity classes, in the same way as
+    :func:`icat.entities.getTypeMap` does.
+    """
+    parameter = type("Parameter", (Entity,), {
+        'InstAttr': frozenset(['id', 'numericValue', 'stringValue']),
+        'InstRel': frozenset(['type']),
+        '__slots__': (),
+    })
+    datasetParameter = type("DatasetParameter", (parameter, Mixin), {
+        'BeanName': "DatasetParameter",
+        'Constraint': ('dataset', 'type'),
+        'InstRel': frozenset(['dataset', 'type']),
+        '__slots__': (),
+    })
+    return parameter, datasetParameter
+
+
+def test_beanname_interned():
+    """The BeanName of the entity classes is interned.
+    """
+    # Build the names at run time, so that they are not interned
+    # by the compiler in the first place.
+    beanName = "".join(["Data", "set"])
+    dataset = type("Dataset", (Entity,), {'BeanName': beanName})
+    assert dataset.BeanName is sys.intern("Dataset")
+    dataset.BeanName = "".join(["Data", "file"])
+    assert dataset.BeanName is sys.intern("Datafile")
+
+def test_attrsets_entity():
+    assert Entity._AttrRel == {'id'}
+    assert Entity._DataAttr == {'id', 'createId', 'createTime',
+                                'modId', 'modTime'}
+    assert Entity._AllRel == set()
+
+def test_attrsets_subclass():
+    """The unions are computed for classes created by type() as well
+    as for classes defined in a class statement.
+    """
+    parameter, datasetParameter = mkclasses()
+
+    class Dataset(Entity):
+        BeanName = "Dataset"
+        InstAttr = frozenset(['id', 'name'])
+        InstRel = frozenset(['investigation'])
+        InstMRel = frozenset(['datafiles', 'parameters'])
+
+    assert Dataset._AttrRel == {'id', 'name', 'investigation'}
+    assert Dataset._AllRel == {'investigation', 'datafiles', 'parameters'}
+    assert parameter._AttrRel == {'id', 'numericValue', 'stringValue',
+                                  'type'}
+    assert datasetParameter._AttrRel == {'id', 'numericValue',
+                                         'stringValue', 'dataset', 'type'}
+    assert datasetParameter._AllRel == {'dataset', 'type'}
+
+def test_attrsets_shared():
+    """Subclasses that do not override any of the attribute sets
+    share the unions of their parent.
+    """
+    parameter, datasetParameter = mkclasses()
+    assert datasetParameter._DataAttr is parameter._DataAttr
+    assert parameter._DataAttr is not Entity._DataAttr
+    assert parameter._AllRel is not Entity._AllRel
+    assert datasetParameter._AllRel is not parameter._AllRel
+
+def test_attrsets_update():
+    """Setting an attribute set later on updates the unions of the
+    class and of its subclasses.
+    """
+    parameter, datasetParameter = mkclasses()
+    parameter.InstAttr = frozenset(['id', 'dateTimeValue'])
+    assert parameter._AttrRel == {'id', 'dateTimeValue', 'type'}
+    assert datasetParameter._AttrRel == {'id', 'dateTimeValue',
+                                         'dataset', 'type'}
+
+def test_constraint_reltypes():
+    """The relTypes of the sort and constraint attributes are
+    computed for each class.
+    """
+    parameter, datasetParameter = mkclasses()
+    assert Entity._ConstraintAttrs == (('id', "ATTRIBUTE"),)
+    assert parameter._ConstraintAttrs == (('id', "ATTRIBUTE"),)
+    assert datasetParameter._ConstraintAttrs == (('dataset', "ONE"),
+                                                 ('type', "ONE"))
+    assert datasetParameter._SortKeyAttrs == (('dataset', "ONE"),
+                                              ('type', "ONE"))
+
+def test_constraint_reltypes_update():
+    """Setting Constraint or SortAttrs later on is taken into account.
+    """
+    parameter, datasetParameter = mkclasses()
+    parameter.Constraint = ('type', 'stringValue')
+    assert parameter._ConstraintAttrs == (('type', "ONE"),
+                                          ('stringValue', "ATTRIBUTE"))
+    # datasetParameter has its own Constraint.
+    assert datasetParameter._ConstraintAttrs == (('dataset', "ONE"),
+                                                 ('type', "ONE"))
+    datasetParameter.SortAttrs = ('type', 'numericValue')
+    assert datasetParameter._SortKeyAttrs == (('type', "ONE"),
+                                              ('numericValue', "ATTRIBUTE"))
+    assert datasetParameter._ConstraintAttrs == (('dataset', "ONE"),
+                                                 ('type', "ONE"))
+
+def test_weakref():
+    """Entity objects support weak references.
+    """
+    parameter, datasetParameter = mkclasses()
+    obj = datasetParameter(None, None)
+    ref = weakref.ref(obj)
+    assert ref() is obj
@@ -0,0 +1,90 @@
+"""Test the handling of failed uploads in Client.putDataMany().
+
+The uploads are replaced by stubs, so these tests do not need an IDS
+server.
+"""
+
+import threading
+import time
+import pytest
+import icat.client
+
+
+class UploadError(Exception):
+    pass
+
+
+class FakeClient():
+    """Just enough of a client to call putDataMany() on.
+
+    The item of each upload is an index that is passed to the upload
+    function.
+    """
+    ids = True
+    putDataMany = icat.client.Client.putDataMany
+
+    def __init__(self, upload):
+        self.upload = upload
+        self.started = set()
+        self.lock = threading.Lock()
+
+    def _check_put_datafile(self, datafile):
+        pass
+
+    def _putData(self, infile, datafile):
+        with self.lock:
+            self.started.add(infile)
+        return self.upload(infile)
+
+    def get(self, beanname, dfid):
+        return (beanname, dfid)
+
+
+class Datafile():
+    BeanName = "Datafile"
+
+
+def test_putDataMany_success():
+    """The results are returned in the order of the input.
+    """
+    def upload(i):
+        time.sleep(0.01 * (i % 3))
+        return 100 + i
+    client = FakeClient(upload)
+    res = client.putDataMany([ (i, Datafile()) for i in range(10) ],
+                             parallel=4)
+    assert res == [ ("Datafile", 100 + i) for i in range(10) ]
+
+def test_putDataMany_cancel():
+    """If one upload fails, the uploads not yet started are cancelled.
+    """
+    def upload(i):
+        if i == 1:
+            raise UploadError(i)
+        time.sleep(0.2)
+        return i
+    client = FakeClient(upload)
+    with pytest.raises(UploadError) as exc_info:
+        client.putDataMany([ (i, Datafile()) for i in range(10) ],
+                           parallel=2)
+    assert exc_info.value.args == (1,)
+    # Item 0 was running when item 1 failed, and the worker that ran
+    # item 1 may have started item 2 before the rest got cancelled.
+    assert client.started <= {0, 1, 2}
+
+def test_putDataMany_first_error():
+    """If several uploads fail, the error of the first failed item in
+    the input is raised.
+    """
+    def upload(i):
+        if i == 0:
+            time.sleep(0.2)
+            raise UploadError(i)
+        elif i == 1:
+            raise UploadError(i)
+        return i
+    client = FakeClient(upload)
+    with pytest.raises(UploadError) as exc_info:
+        client.putDataMany([ (i, Datafile()) for i in range(10) ],
+                           parallel=2)
+    assert exc_info.value.args == (0,)
@@ -36,6 +36,34 @@ def test_logout_no_session_error(client):
     with tmpSessionId(client, "-=- Invalid -=-"):
         client.logout()
 
+# ================== test getEntityConstructor() ===================
+
+def test_getEntityConstructor(client):
+    """The constructor creates the same objects as new().
+    """
+    newDataset = client.getEntityConstructor("dataset")
+    names = ["e201215", "e201216"]
+    datasets = [ newDataset(name=n) for n in names ]
+    for ds, n in zip(datasets, names):
+        ref = client.new("dataset", name=n)
+        assert type(ds) is type(ref)
+        assert ds.BeanName == "Dataset"
+        assert ds.name == n
+        assert ds.id is None
+        # The dummy related objects created by the factory are discarded.
+        assert ds.investigation is None
+        assert ds.type is None
+        assert ds.as_dict() == ref.as_dict()
+    # Each call yields a new independent object.
+    assert datasets[0].instance is not datasets[1].instance
+
+@pytest.mark.parametrize("instancetype", ["foo", "entityBaseBean"])
+def test_getEntityConstructor_invalid(client, instancetype):
+    """Invalid and abstract types are rejected right away.
+    """
+    with pytest.raises(icat.exception.EntityTypeError):
+        client.getEntityConstructor(instancetype)
+
 # ======================== test search() ===========================
 
 cet = datetime.timezone(datetime.timedelta(hours=1))
@@ -367,6 +395,60 @@ def test_searchUniqueKey_objindex_preset(client):
     obj = client.searchUniqueKey(dskey, objindex=objindex)
     assert obj == ds
 
+# ==================== test searchUniqueKeys() =====================
+
+invattrs = "facility-(name-ESNF)_name-10100601=2DST_visitId-1=2E1=2DN"
+invkey = "Investigation_%s" % invattrs
+dskeys = [ "Dataset_investigation-(%s)_name-%s" % (invattrs, n)
+           for n in ("e208339", "e208341", "e208342") ]
+
+def test_searchUniqueKeys_grouped(client):
+    """Keys differing only in one string attribute are searched in bulk.
+    """
+    objindex = {}
+    client.searchUniqueKeys(dskeys, objindex)
+    for k in dskeys:
+        assert k in objindex
+        assert objindex[k].BeanName == "Dataset"
+        assert objindex[k].getUniqueKey() == k
+    # The related objects have been searched and added as well.
+    assert objindex["Facility_name-ESNF"].BeanName == "Facility"
+    assert objindex[invkey].BeanName == "Investigation"
+
+def test_searchUniqueKeys_chunksize(client):
+    """Same as above, but split the search in several chunks.
+    """
+    objindex = {}
+    client.searchUniqueKeys(dskeys, objindex, chunksize=2)
+    for k in dskeys:
+        assert objindex[k].getUniqueKey() == k
+
+def test_searchUniqueKeys_skipped(client):
+    """Keys that cannot be searched in bulk or that are not found are
+    skipped, but searchUniqueKey() still finds them.
+    """
+    nokey = "Dataset_investigation-(%s)_name-foo" % invattrs
+    objindex = {}
+    # An Investigation has two string attributes in its key.
+    client.searchUniqueKeys([invkey, nokey], objindex)
+    assert invkey not in objindex
+    assert nokey not in objindex
+    obj = client.searchUniqueKey(invkey, objindex)
+    assert obj.BeanName == "Investigation"
+    assert obj.name == "10100601-ST"
+    assert objindex[invkey] == obj
+    with pytest.raises(icat.exception.SearchResultError):
+        client.searchUniqueKey(nokey, objindex)
+
+def test_searchUniqueKeys_preset(client):
+    """Keys already in the objindex are not searched again.
+    """
+    ds = client.assertedSearch("Dataset [name='e208945']")[0]
+    dskey = "Dataset_foo"
+    objindex = {dskey : ds}
+    client.searchUniqueKeys([dskey], objindex)
+    assert objindex == {dskey : ds}
+
 # ==================== test searchMatching() =======================
 # searchMatching() is pretty much straight forward.  There are not
 # too much features that could be tested.
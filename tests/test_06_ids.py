@@ -331,6 +331,26 @@ def test_putData_datafileCreateTime(tmpdirsec, client):
     if tzinfo is not None:
         assert df.datafileCreateTime == createTime
 
+def test_putDataMany(tmpdirsec, client):
+    """Upload several files at once with client.putDataMany().
+    """
+    case = testdatafiles[0]
+    dataset = getDataset(client, case)
+    datafileformat = client.assertedSearch("DatafileFormat [name='other']")[0]
+    files = [ DummyDatafile(tmpdirsec, "test_putDataMany_%d.dat" % i, 
+                            case['size'])
+              for i in range(5) ]
+    data = [ (f.fname, client.new("datafile", name=f.name, dataset=dataset,
+                                  datafileFormat=datafileformat))
+             for f in files ]
+    datafiles = client.putDataMany(data, parallel=3)
+    assert [df.name for df in datafiles] == [f.name for f in files]
+    for f in files:
+        df = getDatafile(client, case, f.name)
+        assert df.location is not None
+        assert df.fileSize == f.size
+        assert df.checksum == f.crc32
+
 @pytest.mark.parametrize(("case"), markeddatasets)
 def test_write(client, case):
     """Call write() on a dataset.
@@ -521,6 +521,22 @@ def test_query_include_1(client):
     assert inv.facility.BeanName == "Facility"
     assert inv.type.BeanName == "InvestigationType"
 
+def test_query_include_all(client):
+    """Test including all directly related objects.
+    """
+    query = Query(client, "Dataset", includes="all",
+                  conditions={ "name": "= 'e208945'" })
+    print(str(query))
+    assert query.includes == set(client.typemap['dataset'].InstRel |
+                                 client.typemap['dataset'].InstMRel)
+    res = client.search(query)
+    assert len(res) == 1
+    ds = res[0]
+    assert ds.BeanName == "Dataset"
+    assert ds.investigation.BeanName == "Investigation"
+    assert ds.type.BeanName == "DatasetType"
+    assert len(ds.datafiles) > 0
+
 @pytest.mark.dependency(depends=['get_investigation'])
 def test_query_attribute_datafile_name(client):
     """The datafiles names related to a given investigation in natural order.